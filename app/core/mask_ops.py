@@ -23,7 +23,8 @@ def threshold_segmentation(
     open_kernel = np.ones((open_k, open_k), np.uint8)
     mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, close_kernel)
     mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, open_kernel)
-    return (mask > 0).astype(np.uint8)
+    _, mask = cv2.threshold(mask, 0, 1, cv2.THRESH_BINARY)
+    return mask
 
 
 def apply_brush(mask: np.ndarray, center: tuple[int, int], radius: int, value: int) -> np.ndarray:
@@ -32,6 +33,17 @@ def apply_brush(mask: np.ndarray, center: tuple[int, int], radius: int, value: i
     return out
 
 
+def pack_mask(mask: np.ndarray) -> tuple[bytes, tuple[int, int]]:
+    h, w = mask.shape
+    return np.packbits(mask > 0).tobytes(), (h, w)
+
+
+def unpack_mask(packed: bytes, shape: tuple[int, int]) -> np.ndarray:
+    h, w = shape
+    bits = np.unpackbits(np.frombuffer(packed, dtype=np.uint8), count=h * w)
+    return bits.reshape(h, w)
+
+
 def mask_to_rgba(
     mask: np.ndarray, alpha: float = 0.4, color: tuple[int, int, int] = (255, 0, 0)
 ) -> np.ndarray:
@@ -1,21 +1,42 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
 
 import numpy as np
 
 
-@dataclass
+@dataclass(slots=True)
 class Measurement:
     kind: str
     value_px: float
     value_um: float | None
     details: str = ""
 
+    def to_dict(self) -> dict:
+        return {
+            "type": self.kind,
+            "value_px": self.value_px,
+            "value_um": self.value_um,
+            "details": self.details,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Measurement":
+        return cls(
+            kind=data.get("type", ""),
+            value_px=data.get("value_px", 0.0),
+            value_um=data.get("value_um"),
+            details=data.get("details", ""),
+        )
+
 
 def polyline_length(points: list[tuple[float, float]]) -> float:
     if len(points) < 2:
         return 0.0
+    if len(points) == 2:
+        (x1, y1), (x2, y2) = points
+        return math.hypot(x2 - x1, y2 - y1)
     p = np.asarray(points, dtype=np.float64)
     diffs = np.diff(p, axis=0)
     return float(np.linalg.norm(diffs, axis=1).sum())
@@ -44,13 +65,9 @@ def _resample_polyline(points: np.ndarray, n: int = 200) -> np.ndarray:
     if total == 0:
         return np.repeat(points[:1], n, axis=0)
     t = np.linspace(0, total, n)
-    out = []
-    for ti in t:
-        idx = np.searchsorted(cum, ti, side="right") - 1
-        idx = np.clip(idx, 0, len(seg) - 1)
-        local = (ti - cum[idx]) / max(seg[idx], 1e-9)
-        out.append(points[idx] + local * (points[idx + 1] - points[idx]))
-    return np.asarray(out)
+    idx = np.clip(np.searchsorted(cum, t, side="right") - 1, 0, len(seg) - 1)
+    local = (t - cum[idx]) / np.maximum(seg[idx], 1e-9)
+    return points[idx] + local[:, None] * (points[idx + 1] - points[idx])
 
 
 def thickness_distribution(
@@ -4,27 +4,24 @@ from pathlib import Path
 
 import cv2
 import numpy as np
+from PIL import Image
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 
 
-def _overlay(image_rgb: np.ndarray, mask: np.ndarray) -> np.ndarray:
-    out = image_rgb.copy()
-    color = np.zeros_like(out)
-    color[..., 0] = 255
-    alpha = (mask > 0).astype(np.float32) * 0.35
-    out = (out * (1 - alpha[..., None]) + color * alpha[..., None]).astype(np.uint8)
-    return out
+_RED_RGB_U8 = np.array([255, 0, 0], dtype=np.uint8)
+
+
+def _overlay(image_rgb: np.ndarray, mask: np.ndarray, alpha: float = 0.35) -> np.ndarray:
+    red = np.broadcast_to(_RED_RGB_U8, image_rgb.shape)
+    blended = cv2.addWeighted(image_rgb, 1.0 - alpha, red, alpha, 0)
+    return np.where((mask > 0)[..., None], blended, image_rgb)
 
 
 def _to_reader(img_rgb: np.ndarray) -> ImageReader:
-    bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
-    ok, buf = cv2.imencode(".png", bgr)
-    if not ok:
-        raise ValueError("Failed to encode image for PDF")
-    return ImageReader(buf.tobytes())
+    return ImageReader(Image.fromarray(img_rgb))
 
 
 def export_pdf_report(
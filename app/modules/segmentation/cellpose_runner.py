@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Any
+
 import numpy as np
 
 try:
@@ -10,12 +12,22 @@ except Exception:
     models = None
     CELLPPOSE_AVAILABLE = False
 
+_model_cache: dict[str, Any] = {}
+
+
+def _get_model(model_type: str) -> Any:
+    model = _model_cache.get(model_type)
+    if model is None:
+        model = models.Cellpose(model_type=model_type)
+        _model_cache[model_type] = model
+    return model
+
 
 def run_cellpose(
     image_rgb: np.ndarray, model_type: str = "cyto", diameter: float | None = None
 ) -> np.ndarray:
     if not CELLPPOSE_AVAILABLE:
         raise RuntimeError("Cellpose is not installed")
-    model = models.Cellpose(model_type=model_type)
+    model = _get_model(model_type)
     masks, *_ = model.eval(image_rgb, diameter=diameter, channels=[0, 0])
     return (masks > 0).astype(np.uint8)
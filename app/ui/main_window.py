@@ -5,7 +5,7 @@ from pathlib import Path
 import cv2
 import numpy as np
 from PIL import Image
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtWidgets import (
     QComboBox,
     QFormLayout,
@@ -25,12 +25,19 @@ from PySide6.QtWidgets import (
 )
 
 from app.core.image_ops import EnhanceParams, apply_enhancements
-from app.core.mask_ops import threshold_segmentation
-from app.core.morphometry import polygon_area, polyline_length, thickness_distribution, to_um
+from app.core.mask_ops import pack_mask, threshold_segmentation, unpack_mask
+from app.core.morphometry import (
+    Measurement,
+    polygon_area,
+    polyline_length,
+    thickness_distribution,
+    to_um,
+)
 from app.core.project_io import load_project, save_project
 from app.export.csv_export import export_measurements_csv
 from app.export.pdf_report import export_pdf_report
 from app.modules.segmentation.cellpose_runner import CELLPPOSE_AVAILABLE, run_cellpose
+from app.utils.workers import CancellableWorker, submit_cpu
 from app.viewer.image_view import ImageView
 
 
@@ -46,14 +53,20 @@ class MainWindow(QMainWindow):
         self.mask: np.ndarray | None = None
 
         self.enhance_params = EnhanceParams()
-        self.measurements: list[dict] = []
+        self.measurements: list[Measurement] = []
         self.annotations: list[dict] = []
         self.um_per_px: float | None = None
 
-        self.mask_undo: list[np.ndarray] = []
-        self.mask_redo: list[np.ndarray] = []
+        self.mask_undo: list[tuple[bytes, tuple[int, int]]] = []
+        self.mask_redo: list[tuple[bytes, tuple[int, int]]] = []
+
+        self.thickness_line1: np.ndarray | None = None
 
-        self.thickness_line1: list[tuple[float, float]] | None = None
+        self._enhance_worker: CancellableWorker | None = None
+        self._enhance_timer = QTimer(self)
+        self._enhance_timer.setSingleShot(True)
+        self._enhance_timer.setInterval(16)
+        self._enhance_timer.timeout.connect(self._apply_enhance_now)
 
         self._build_ui()
         self._build_menu()
@@ -103,6 +116,7 @@ class MainWindow(QMainWindow):
         self.view = ImageView()
         self.view.measurement_finished.connect(self.on_measurement)
         self.view.scale_line_finished.connect(self.on_scale_line_finished)
+        self.view.mask_about_to_change.connect(self.push_undo)
         self.view.mask_changed.connect(self.on_mask_changed)
         root.addWidget(self.view, 1)
 
@@ -173,9 +187,9 @@ class MainWindow(QMainWindow):
         form.addRow("Mask opacity", self.mask_alpha)
         layout.addLayout(form)
 
-        run_thresh = QPushButton("Run threshold segmentation")
-        run_thresh.clicked.connect(self.run_threshold)
-        layout.addWidget(run_thresh)
+        self.threshold_btn = QPushButton("Run threshold segmentation")
+        self.threshold_btn.clicked.connect(self.run_threshold)
+        layout.addWidget(self.threshold_btn)
 
         self.cellpose_model = QComboBox()
         self.cellpose_model.addItems(["cyto", "nuclei"])
@@ -247,9 +261,29 @@ class MainWindow(QMainWindow):
     def on_enhance_changed(self) -> None:
         if self.original is None:
             return
-        for key, slider in self.enhance_sliders.items():
-            setattr(self.enhance_params, key, slider.value())
-        self.enhanced = apply_enhancements(self.original, self.enhance_params)
+        if not self._enhance_timer.isActive():
+            self._enhance_timer.start()
+
+    def _apply_enhance_now(self) -> None:
+        if self.original is None:
+            return
+        self.enhance_params = EnhanceParams(
+            **{key: slider.value() for key, slider in self.enhance_sliders.items()}
+        )
+        if self._enhance_worker is not None:
+            self._enhance_worker.cancel()
+        worker = CancellableWorker(apply_enhancements, self.original, self.enhance_params)
+        worker.signals.finished.connect(
+            lambda enhanced, w=worker: self._on_enhance_finished(w, enhanced)
+        )
+        self._enhance_worker = worker
+        submit_cpu(worker)
+
+    def _on_enhance_finished(self, worker: CancellableWorker, enhanced: np.ndarray) -> None:
+        if worker is not self._enhance_worker:
+            return
+        self._enhance_worker = None
+        self.enhanced = enhanced
         self.view.update_enhanced(self.enhanced)
 
     def reset_enhance(self) -> None:
@@ -263,58 +297,80 @@ class MainWindow(QMainWindow):
     def push_undo(self) -> None:
         if self.mask is None:
             return
-        self.mask_undo.append(self.mask.copy())
+        self.mask_undo.append(pack_mask(self.mask))
         self.mask_undo = self.mask_undo[-20:]
         self.mask_redo.clear()
 
     def on_mask_changed(self, new_mask: np.ndarray) -> None:
-        if self.mask is not None:
-            self.mask_undo.append(self.mask.copy())
-            self.mask_undo = self.mask_undo[-20:]
+        # The view edits the mask in place; undo state is captured by
+        # push_undo via mask_about_to_change before each stroke starts.
         self.mask = new_mask
 
     def undo_mask(self) -> None:
         if not self.mask_undo or self.mask is None:
             return
-        self.mask_redo.append(self.mask.copy())
-        self.mask = self.mask_undo.pop()
+        self.mask_redo.append(pack_mask(self.mask))
+        self.mask = unpack_mask(*self.mask_undo.pop())
         self.view.update_mask(self.mask)
 
     def redo_mask(self) -> None:
         if not self.mask_redo or self.mask is None:
             return
-        self.mask_undo.append(self.mask.copy())
-        self.mask = self.mask_redo.pop()
+        self.mask_undo.append(pack_mask(self.mask))
+        self.mask = unpack_mask(*self.mask_redo.pop())
         self.view.update_mask(self.mask)
 
     def run_threshold(self) -> None:
         if self.enhanced is None:
             return
-        self.push_undo()
-        self.mask = threshold_segmentation(
+        self.threshold_btn.setEnabled(False)
+        worker = CancellableWorker(
+            threshold_segmentation,
             self.enhanced,
             mode=self.threshold_mode.currentText(),
             close_size=self.close_size.value(),
             open_size=self.open_size.value(),
             manual_threshold=self.manual_threshold.value(),
         )
+        worker.signals.finished.connect(self._on_threshold_finished)
+        worker.signals.error.connect(self._on_threshold_error)
+        submit_cpu(worker)
+
+    def _on_threshold_finished(self, mask: np.ndarray) -> None:
+        self.threshold_btn.setEnabled(True)
+        self.push_undo()
+        self.mask = mask
         self.view.update_mask(self.mask)
 
+    def _on_threshold_error(self, message: str) -> None:
+        self.threshold_btn.setEnabled(True)
+        QMessageBox.warning(self, "Threshold error", message)
+
     def run_cellpose_clicked(self) -> None:
         if self.enhanced is None:
             return
         dia_txt = self.cellpose_diameter.text().strip().lower()
         diameter = None if dia_txt in {"", "auto"} else float(dia_txt)
-        try:
-            self.push_undo()
-            self.mask = run_cellpose(
-                self.enhanced,
-                model_type=self.cellpose_model.currentText(),
-                diameter=diameter,
-            )
-            self.view.update_mask(self.mask)
-        except Exception as exc:
-            QMessageBox.warning(self, "Cellpose error", str(exc))
+        self.cellpose_btn.setEnabled(False)
+        worker = CancellableWorker(
+            run_cellpose,
+            self.enhanced,
+            model_type=self.cellpose_model.currentText(),
+            diameter=diameter,
+        )
+        worker.signals.finished.connect(self._on_cellpose_finished)
+        worker.signals.error.connect(self._on_cellpose_error)
+        submit_cpu(worker)
+
+    def _on_cellpose_finished(self, mask: np.ndarray) -> None:
+        self.cellpose_btn.setEnabled(CELLPPOSE_AVAILABLE)
+        self.push_undo()
+        self.mask = mask
+        self.view.update_mask(self.mask)
+
+    def _on_cellpose_error(self, message: str) -> None:
+        self.cellpose_btn.setEnabled(CELLPPOSE_AVAILABLE)
+        QMessageBox.warning(self, "Cellpose error", message)
 
     def apply_um_per_px(self) -> None:
         txt = self.um_edit.text().strip()
@@ -341,46 +397,49 @@ class MainWindow(QMainWindow):
     def on_measurement(self, payload: dict) -> None:
         kind = payload["type"]
         points = payload["points"]
+        count_before = len(self.measurements)
+        pts = np.asarray(points, dtype=np.float64)
 
         if kind == "line":
-            value_px = polyline_length(points[:2])
+            value_px = polyline_length(pts[:2])
             self._add_measurement("line", value_px, points=str(points[:2]))
         elif kind == "polyline":
-            value_px = polyline_length(points)
+            value_px = polyline_length(pts)
             self._add_measurement("polyline", value_px, points=f"n={len(points)}")
         elif kind == "area":
-            value_px = polygon_area(points)
+            value_px = polygon_area(pts)
             value_um = None if self.um_per_px is None else value_px * (self.um_per_px**2)
             self.measurements.append(
-                {
-                    "type": "area",
-                    "value_px": round(value_px, 3),
-                    "value_um": None if value_um is None else round(value_um, 3),
-                    "details": f"n={len(points)}",
-                }
+                Measurement(
+                    kind="area",
+                    value_px=round(value_px, 3),
+                    value_um=None if value_um is None else round(value_um, 3),
+                    details=f"n={len(points)}",
+                )
             )
         elif kind == "thickness_1":
-            self.thickness_line1 = points
+            self.thickness_line1 = pts
             self.annotations.append({"type": "thickness_1", "points": points})
         elif kind == "thickness_2":
             self.annotations.append({"type": "thickness_2", "points": points})
             if self.thickness_line1 is not None:
-                stats = thickness_distribution(self.thickness_line1, points)
+                stats = thickness_distribution(self.thickness_line1, pts)
                 self.measurements.append(
-                    {
-                        "type": "thickness_mean",
-                        "value_px": round(stats["mean"], 3),
-                        "value_um": (
+                    Measurement(
+                        kind="thickness_mean",
+                        value_px=round(stats["mean"], 3),
+                        value_um=(
                             None
                             if self.um_per_px is None
                             else round(stats["mean"] * self.um_per_px, 3)
                         ),
-                        "details": (
+                        details=(
                             f"median={stats['median']:.2f}; min={stats['min']:.2f}; max={stats['max']:.2f}"
                         ),
-                    }
+                    )
                 )
-        self.results_label.setText(f"Measurements: {len(self.measurements)}")
+        if len(self.measurements) != count_before:
+            self.results_label.setText(f"Measurements: {len(self.measurements)}")
 
     def compute_thickness(self) -> None:
         l1 = next((a["points"] for a in self.annotations if a["type"] == "thickness_1"), None)
@@ -394,27 +453,27 @@ class MainWindow(QMainWindow):
             return
         stats = thickness_distribution(l1, l2)
         self.measurements.append(
-            {
-                "type": "thickness_mean",
-                "value_px": round(stats["mean"], 3),
-                "value_um": (
+            Measurement(
+                kind="thickness_mean",
+                value_px=round(stats["mean"], 3),
+                value_um=(
                     None if self.um_per_px is None else round(stats["mean"] * self.um_per_px, 3)
                 ),
-                "details": f"median={stats['median']:.2f}; min={stats['min']:.2f}; max={stats['max']:.2f}",
-            }
+                details=f"median={stats['median']:.2f}; min={stats['min']:.2f}; max={stats['max']:.2f}",
+            )
         )
         self.results_label.setText(f"Measurements: {len(self.measurements)}")
 
     def _add_measurement(self, kind: str, value_px: float, points: str = "") -> None:
         self.measurements.append(
-            {
-                "type": kind,
-                "value_px": round(value_px, 3),
-                "value_um": (
+            Measurement(
+                kind=kind,
+                value_px=round(value_px, 3),
+                value_um=(
                     None if self.um_per_px is None else round(to_um(value_px, self.um_per_px), 3)
                 ),
-                "details": points,
-            }
+                details=points,
+            )
         )
 
     def save_project(self) -> None:
@@ -429,7 +488,7 @@ class MainWindow(QMainWindow):
             self.enhance_params,
             self.mask,
             self.annotations,
-            self.measurements,
+            [m.to_dict() for m in self.measurements],
             self.um_per_px,
         )
 
@@ -446,13 +505,15 @@ class MainWindow(QMainWindow):
         self.enhance_params = EnhanceParams.from_dict(payload.get("enhance", {}))
         for key, slider in self.enhance_sliders.items():
             slider.setValue(getattr(self.enhance_params, key))
-        self.on_enhance_changed()
+        # setValue above arms the debounce timer on any change; restarting it
+        # schedules exactly one run even when the sliders did not move.
+        self._enhance_timer.start()
         self.mask = cv2.resize(
             mask, (self.original.shape[1], self.original.shape[0]), interpolation=cv2.INTER_NEAREST
         )
         self.view.update_mask(self.mask)
         self.annotations = payload.get("annotations", [])
-        self.measurements = payload.get("measurements", [])
+        self.measurements = [Measurement.from_dict(d) for d in payload.get("measurements", [])]
         self.um_per_px = payload.get("um_per_px")
         if self.um_per_px is not None:
             self.um_edit.setText(f"{self.um_per_px:.6f}")
@@ -464,7 +525,7 @@ class MainWindow(QMainWindow):
         path, _ = QFileDialog.getSaveFileName(self, "Export CSV", "measurements.csv", "CSV (*.csv)")
         if not path:
             return
-        export_measurements_csv(path, self.measurements)
+        export_measurements_csv(path, [m.to_dict() for m in self.measurements])
 
     def export_pdf(self) -> None:
         if self.original is None or self.enhanced is None or self.mask is None:
@@ -472,4 +533,6 @@ class MainWindow(QMainWindow):
         path, _ = QFileDialog.getSaveFileName(self, "Export PDF", "report.pdf", "PDF (*.pdf)")
         if not path:
             return
-        export_pdf_report(path, self.original, self.enhanced, self.mask, self.measurements)
+        export_pdf_report(
+            path, self.original, self.enhanced, self.mask, [m.to_dict() for m in self.measurements]
+        )
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import inspect
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Any, Callable
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class WorkerSignals(QObject):
+    finished = Signal(object)
+    error = Signal(str)
+
+
+class CancellableWorker(QRunnable):
+    """Runs a callable on a worker thread and reports the result via signals.
+
+    If the callable accepts a ``cancel_token`` keyword, the worker's cancel
+    event is passed in so long-running functions can poll it and bail out.
+    """
+
+    def __init__(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    def run(self) -> None:
+        if self.cancel_event.is_set():
+            return
+        kwargs = self.kwargs
+        if _accepts_cancel_token(self.fn):
+            kwargs = {**kwargs, "cancel_token": self.cancel_event}
+        try:
+            result = self.fn(*self.args, **kwargs)
+        except Exception as exc:
+            self.signals.error.emit(str(exc))
+            return
+        if not self.cancel_event.is_set():
+            self.signals.finished.emit(result)
+
+
+def _accepts_cancel_token(fn: Callable[..., Any]) -> bool:
+    try:
+        params = inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+    return "cancel_token" in params or any(
+        p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values()
+    )
+
+
+class ProcessWorker(QRunnable):
+    """Runs a picklable callable in a worker process for GIL-free CPU work.
+
+    Thread-pool workers stay the default because OpenCV releases the GIL and
+    ndarray arguments cross process boundaries by pickling; use this variant
+    for pure-Python CPU-bound callables where that copy is worth it.
+    """
+
+    def __init__(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    def run(self) -> None:
+        if self.cancel_event.is_set():
+            return
+        future = _process_pool().submit(self.fn, *self.args, **self.kwargs)
+        while not future.done():
+            if self.cancel_event.is_set():
+                # cancel() only stops a task that has not started; either
+                # way the result is discarded, so there is nothing to wait for.
+                future.cancel()
+                return
+            wait([future], timeout=0.05)
+        if self.cancel_event.is_set():
+            return
+        try:
+            result = future.result()
+        except Exception as exc:
+            self.signals.error.emit(str(exc))
+            return
+        self.signals.finished.emit(result)
+
+
+_process_pool_instance: ProcessPoolExecutor | None = None
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _process_pool_instance
+    if _process_pool_instance is None:
+        _process_pool_instance = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _process_pool_instance
+
+
+CPU_POOL = QThreadPool()
+CPU_POOL.setMaxThreadCount(min(8, os.cpu_count() or 1))
+
+IO_POOL = QThreadPool()
+IO_POOL.setMaxThreadCount(8)
+
+
+def submit_cpu(worker: QRunnable) -> None:
+    CPU_POOL.start(worker)
+
+
+def submit_io(worker: QRunnable) -> None:
+    IO_POOL.start(worker)
@@ -1,31 +1,47 @@
 from __future__ import annotations
 
+import math
 
 import cv2
 import numpy as np
-from PySide6.QtCore import QPoint, QPointF, Qt, Signal
-from PySide6.QtGui import QImage, QPainterPath, QPen, QPixmap
+from PySide6.QtCore import QPoint, QPointF, Qt, QTimer, Signal
+from PySide6.QtGui import QImage, QPainter, QPainterPath, QPen, QPixmap
 from PySide6.QtWidgets import QGraphicsPathItem, QGraphicsPixmapItem, QGraphicsScene, QGraphicsView
 
+_MASK_LUT = np.array([[0, 0, 0, 0], [255, 0, 0, 100]], dtype=np.uint8)
+
 
 class ImageView(QGraphicsView):
     measurement_finished = Signal(dict)
     scale_line_finished = Signal(float)
+    mask_about_to_change = Signal()
     mask_changed = Signal(np.ndarray)
 
     def __init__(self, parent=None) -> None:
         super().__init__(parent)
         self.scene = QGraphicsScene(self)
+        # A handful of fixed items; BSP indexing only adds per-setPixmap cost.
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
         self.setScene(self.scene)
-        self.setRenderHints(self.renderHints() | self.RenderHint.Antialiasing)
+        self.setRenderHints(
+            QPainter.RenderHint.Antialiasing | QPainter.RenderHint.SmoothPixmapTransform
+        )
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing, True)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.BoundingRectViewportUpdate)
         self.setDragMode(QGraphicsView.DragMode.NoDrag)
         self.setMouseTracking(True)
 
         self.base_item = QGraphicsPixmapItem()
         self.overlay_item = QGraphicsPixmapItem()
+        self.base_item.setTransformationMode(Qt.TransformationMode.SmoothTransformation)
         self.scene.addItem(self.base_item)
         self.scene.addItem(self.overlay_item)
 
+        self._interaction_timer = QTimer(self)
+        self._interaction_timer.setSingleShot(True)
+        self._interaction_timer.setInterval(500)
+        self._interaction_timer.timeout.connect(self._end_interaction)
+
         self.current_tool = "hand"
         self.brush_size = 10
         self.um_per_px: float | None = None
@@ -37,7 +53,31 @@ class ImageView(QGraphicsView):
         self._is_panning = False
         self._last_mouse_pos = QPoint()
         self._points: list[tuple[float, float]] = []
-        self._preview_item: QGraphicsPathItem | None = None
+        self._preview_item = QGraphicsPathItem()
+        self._preview_item.setPen(QPen(Qt.GlobalColor.green, 2))
+        self._preview_path = QPainterPath()
+        self._preview_len = 0
+        self.scene.addItem(self._preview_item)
+
+        self._overlay_rgba: np.ndarray | None = None
+        self._overlay_pix: QPixmap | None = None
+        self._base_key: int | None = None
+        self._pyramid_arrays: list[np.ndarray] = []
+        self._pyramid_pixmaps: dict[int, QPixmap] = {}
+        self._max_level = 0
+        self._base_level = -1
+        self._base_arr_ref: np.ndarray | None = None
+        self._overlay_arr_ref: np.ndarray | None = None
+        self._last_scene_size: tuple[int, int] | None = None
+        self._overlay_key: int | None = None
+        self._dirty = False
+        self._brush_stamp: np.ndarray | None = None
+        self._brush_stamp_size = -1
+
+        self._mask_emit_timer = QTimer(self)
+        self._mask_emit_timer.setSingleShot(True)
+        self._mask_emit_timer.setInterval(16)
+        self._mask_emit_timer.timeout.connect(self._emit_mask_changed)
 
     def set_tool(self, tool: str) -> None:
         self.current_tool = tool
@@ -48,24 +88,43 @@ class ImageView(QGraphicsView):
 
     def set_images(self, original: np.ndarray, enhanced: np.ndarray, mask: np.ndarray) -> None:
         self.original = original
-        self.enhanced = enhanced
+        self.enhanced = np.ascontiguousarray(enhanced)
         self.mask = mask
+        self._base_key = None
+        self._overlay_key = None
         self._refresh_scene()
 
     def update_enhanced(self, enhanced: np.ndarray) -> None:
-        self.enhanced = enhanced
+        self.enhanced = np.ascontiguousarray(enhanced)
+        self._base_key = None
         self._refresh_scene()
 
     def update_mask(self, mask: np.ndarray) -> None:
         self.mask = mask
+        self._overlay_key = None
         self._refresh_scene()
 
     def fit_image(self) -> None:
         self.fitInView(self.base_item, Qt.AspectRatioMode.KeepAspectRatio)
+        self._apply_base_level()
+
+    def _begin_interaction(self) -> None:
+        self.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        self.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, False)
+        self.base_item.setTransformationMode(Qt.TransformationMode.FastTransformation)
+        self._interaction_timer.start()
+
+    def _end_interaction(self) -> None:
+        self.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+        self.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
+        self.base_item.setTransformationMode(Qt.TransformationMode.SmoothTransformation)
+        self.viewport().update()
 
     def wheelEvent(self, event):
+        self._begin_interaction()
         factor = 1.2 if event.angleDelta().y() > 0 else 1 / 1.2
         self.scale(factor, factor)
+        self._apply_base_level()
 
     def mousePressEvent(self, event):
         pos = self.mapToScene(event.pos())
@@ -76,11 +135,15 @@ class ImageView(QGraphicsView):
             self._is_panning = True
             self._last_mouse_pos = event.pos()
             self.setCursor(Qt.CursorShape.ClosedHandCursor)
+            self._begin_interaction()
             return
 
         if self.mask is not None and self.current_tool in {"brush", "eraser"}:
-            value = 1 if self.current_tool == "brush" else 0
-            self._paint_mask(x, y, value)
+            h, w = self.mask.shape
+            if 0 <= x < w and 0 <= y < h:
+                value = 1 if self.current_tool == "brush" else 0
+                self.mask_about_to_change.emit()
+                self._paint_mask(x, y, value)
             return
 
         if self.current_tool in {
@@ -102,6 +165,7 @@ class ImageView(QGraphicsView):
     def mouseMoveEvent(self, event):
         pos = self.mapToScene(event.pos())
         if self._is_panning:
+            self._interaction_timer.start()
             delta = event.pos() - self._last_mouse_pos
             self._last_mouse_pos = event.pos()
             self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - delta.x())
@@ -136,50 +200,133 @@ class ImageView(QGraphicsView):
             return
         super().mouseDoubleClickEvent(event)
 
+    def _get_brush_stamp(self) -> np.ndarray:
+        if self._brush_stamp is None or self._brush_stamp_size != self.brush_size:
+            r = self.brush_size
+            stamp = np.zeros((2 * r + 1, 2 * r + 1), dtype=np.uint8)
+            cv2.circle(stamp, (r, r), r, 1, thickness=-1)
+            self._brush_stamp = stamp.astype(bool)
+            self._brush_stamp_size = r
+        return self._brush_stamp
+
     def _paint_mask(self, x: int, y: int, value: int) -> None:
         if self.mask is None:
             return
         h, w = self.mask.shape
         if x < 0 or y < 0 or x >= w or y >= h:
             return
-        cv2.circle(self.mask, (x, y), self.brush_size, value, thickness=-1)
-        self.mask_changed.emit(self.mask.copy())
-        self._refresh_scene()
+        r = self.brush_size
+        stamp = self._get_brush_stamp()
+        x0, y0 = max(0, x - r), max(0, y - r)
+        x1, y1 = min(w, x + r + 1), min(h, y + r + 1)
+        sub = stamp[y0 - (y - r) : y1 - (y - r), x0 - (x - r) : x1 - (x - r)]
+        self.mask[y0:y1, x0:x1][sub] = value
+        if self._overlay_rgba is None or self._overlay_pix is None:
+            self._rebuild_overlay()
+        else:
+            self._overlay_rgba[y0:y1, x0:x1][sub] = _MASK_LUT[1 if value else 0]
+            self._refresh_overlay_rect(x0, y0, x1, y1)
+        if not self._mask_emit_timer.isActive():
+            self._mask_emit_timer.start()
+
+    def _emit_mask_changed(self) -> None:
+        if self.mask is not None:
+            self.mask_changed.emit(self.mask)
+
+    def _refresh_overlay_rect(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        sub = np.ascontiguousarray(self._overlay_rgba[y0:y1, x0:x1])
+        img = QImage(sub.data, x1 - x0, y1 - y0, 4 * (x1 - x0), QImage.Format.Format_RGBA8888)
+        painter = QPainter(self._overlay_pix)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.drawImage(QPoint(x0, y0), img)
+        painter.end()
+        self.overlay_item.setPixmap(self._overlay_pix)
 
     def _to_qimage_rgb(self, arr: np.ndarray) -> QImage:
-        h, w, ch = arr.shape
-        return QImage(arr.data, w, h, ch * w, QImage.Format.Format_RGB888).copy()
+        h, w, _ = arr.shape
+        self._base_arr_ref = arr
+        return QImage(arr.data, w, h, arr.strides[0], QImage.Format.Format_RGB888)
 
     def _to_qimage_rgba(self, arr: np.ndarray) -> QImage:
-        h, w, ch = arr.shape
-        return QImage(arr.data, w, h, ch * w, QImage.Format.Format_RGBA8888).copy()
+        h, w, _ = arr.shape
+        self._overlay_arr_ref = arr
+        return QImage(arr.data, w, h, arr.strides[0], QImage.Format.Format_RGBA8888)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._dirty:
+            self._dirty = False
+            self._refresh_scene()
 
     def _refresh_scene(self) -> None:
         if self.enhanced is None:
             return
-        base = QPixmap.fromImage(self._to_qimage_rgb(self.enhanced))
-        self.base_item.setPixmap(base)
-        self.overlay_item.setPixmap(QPixmap())
-        if self.mask is not None:
-            overlay = np.zeros((self.mask.shape[0], self.mask.shape[1], 4), dtype=np.uint8)
-            overlay[self.mask > 0] = (255, 0, 0, 100)
-            self.overlay_item.setPixmap(QPixmap.fromImage(self._to_qimage_rgba(overlay)))
-
-        self.scene.setSceneRect(self.base_item.boundingRect())
+        if not self.isVisible():
+            self._dirty = True
+            return
+        if self._base_key != id(self.enhanced):
+            h, w = self.enhanced.shape[:2]
+            self._pyramid_arrays = [self.enhanced]
+            self._pyramid_pixmaps = {}
+            self._max_level = max(0, int(math.log2(max(min(h, w) / 256, 1))))
+            self._base_level = -1
+            self._base_key = id(self.enhanced)
+        self._apply_base_level()
+        if self._overlay_key != id(self.mask) or self._overlay_rgba is None:
+            self._rebuild_overlay()
+            self._overlay_key = None if self.mask is None else id(self.mask)
+        new_size = (self.enhanced.shape[1], self.enhanced.shape[0])
+        if new_size != self._last_scene_size:
+            self.scene.setSceneRect(0, 0, new_size[0], new_size[1])
+            self._last_scene_size = new_size
+
+    def _apply_base_level(self) -> None:
+        if self.enhanced is None or self._base_key is None:
+            return
+        zoom = self.transform().m11()
+        level = 0
+        if 0 < zoom < 1.0:
+            level = min(self._max_level, int(-math.log2(zoom)))
+        if level == self._base_level:
+            return
+        while len(self._pyramid_arrays) <= level:
+            self._pyramid_arrays.append(np.ascontiguousarray(cv2.pyrDown(self._pyramid_arrays[-1])))
+        pix = self._pyramid_pixmaps.get(level)
+        if pix is None:
+            pix = QPixmap.fromImage(self._to_qimage_rgb(self._pyramid_arrays[level]))
+            self._pyramid_pixmaps[level] = pix
+        self.base_item.setPixmap(pix)
+        self.base_item.setScale(float(1 << level))
+        self._base_level = level
+
+    def _rebuild_overlay(self) -> None:
+        if self.mask is None:
+            self._overlay_rgba = None
+            self._overlay_pix = None
+            self.overlay_item.setPixmap(QPixmap())
+            return
+        h, w = self.mask.shape
+        if self._overlay_rgba is None or self._overlay_rgba.shape[:2] != (h, w):
+            self._overlay_rgba = np.empty((h, w, 4), dtype=np.uint8)
+        np.take(_MASK_LUT, np.minimum(self.mask, 1), axis=0, out=self._overlay_rgba)
+        self._overlay_pix = QPixmap.fromImage(self._to_qimage_rgba(self._overlay_rgba))
+        self.overlay_item.setPixmap(self._overlay_pix)
 
     def _update_preview(self) -> None:
-        if self._preview_item is not None:
-            self.scene.removeItem(self._preview_item)
-            self._preview_item = None
-        if len(self._points) < 2:
+        n = len(self._points)
+        if n < 2:
+            if self._preview_len:
+                self._preview_path = QPainterPath()
+                self._preview_item.setPath(self._preview_path)
+                self._preview_len = 0
             return
-        path = QPainterPath(QPointF(*self._points[0]))
-        for p in self._points[1:]:
-            path.lineTo(QPointF(*p))
-        item = QGraphicsPathItem(path)
-        item.setPen(QPen(Qt.GlobalColor.green, 2))
-        self.scene.addItem(item)
-        self._preview_item = item
+        if self._preview_len == 0:
+            self._preview_path.moveTo(QPointF(*self._points[0]))
+            self._preview_len = 1
+        for p in self._points[self._preview_len :]:
+            self._preview_path.lineTo(QPointF(*p))
+        self._preview_len = n
+        self._preview_item.setPath(self._preview_path)
 
     def _finish_line_measurement(self, kind: str) -> None:
         if len(self._points) < 2:
@@ -201,7 +348,7 @@ class ImageView(QGraphicsView):
         if len(self._points) < 2:
             return
         p1, p2 = self._points[0], self._points[-1]
-        dist = float(np.linalg.norm(np.array(p1) - np.array(p2)))
+        dist = math.hypot(p1[0] - p2[0], p1[1] - p2[1])
         self._points.clear()
         self._update_preview()
         self.scale_line_finished.emit(dist)
@@ -0,0 +1,22 @@
+import numpy as np
+
+from app.core.mask_ops import pack_mask, threshold_segmentation, unpack_mask
+
+
+def test_pack_unpack_roundtrip() -> None:
+    rng = np.random.default_rng(0)
+    mask = (rng.random((37, 53)) > 0.5).astype(np.uint8)
+    packed, shape = pack_mask(mask)
+    assert len(packed) < mask.size
+    restored = unpack_mask(packed, shape)
+    assert restored.shape == mask.shape
+    assert np.array_equal(restored, mask)
+
+
+def test_threshold_segmentation_binary_output() -> None:
+    img = np.zeros((32, 32, 3), dtype=np.uint8)
+    img[8:24, 8:24] = 255
+    mask = threshold_segmentation(img, mode="manual", manual_threshold=128)
+    assert set(np.unique(mask)) <= {0, 1}
+    assert mask[16, 16] == 1
+    assert mask[0, 0] == 0